@@ -1,10 +1,14 @@
 # pages/2_find_a_doctor.py
+import logging
 import math
+import pickle
 import re
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import streamlit as st
-import pgeocode
-from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
 
 # -------------------------
 # Page chrome
@@ -17,11 +21,9 @@ st.set_page_config(
 
 col1, col2 = st.columns([1, 1])
 with col1:
-    image = Image.open("assets/h4u_logo.png")
-    st.image(image.resize((600, 250)))
+    st.image("assets/h4u_logo_600x250.jpg")
 with col2:
-    image = Image.open("assets/ai_doctor_hero4.jpg")
-    st.image(image.resize((600, 350)))
+    st.image("assets/ai_doctor_hero4_600x350.jpg")
 
 # -------------------------
 # Helpers
@@ -34,10 +36,31 @@ def _normalize_zip(raw: str | None) -> str | None:
 
 @st.cache_resource
 def geocoder():
+    # Only built when a ZIP is missing from the prebuilt table
+    import pgeocode
     return pgeocode.Nominatim("us")
 
-@st.cache_data(ttl=900, show_spinner=False)
+# Prebuilt by scripts/build_zip_centroids.py; ZIP centroids are effectively static
+ZIP_CENTROIDS_PATH = "assets/zip_centroids.pkl"
+
+@st.cache_resource
+def zip_centroids() -> dict:
+    """{zip5: (lat, lon, state)} loaded once per process; empty if the asset is missing."""
+    try:
+        with open(ZIP_CENTROIDS_PATH, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError) as e:
+        # cache_resource runs this once per process, so this warns once
+        logging.getLogger(__name__).warning(
+            "ZIP centroid table unavailable (%s); falling back to pgeocode. "
+            "Run scripts/build_zip_centroids.py to rebuild it.", e)
+        return {}
+
+@st.cache_data(show_spinner=False, max_entries=50000)
 def geocode_zip(z: str):
+    hit = zip_centroids().get(z)
+    if hit:
+        return hit
     rec = geocoder().query_postal_code(z)
     try:
         lat, lon = float(rec.latitude), float(rec.longitude)
@@ -47,13 +70,25 @@ def geocode_zip(z: str):
     except Exception:
         return None
 
+def geocode_zips(zips: list[str]):
+    """Batch ZIP -> (lats, lons) arrays; NaN where unknown."""
+    table = zip_centroids()
+    found = {z: table[z][:2] for z in zips if z in table}
+    missing = [z for z in zips if z not in found]
+    if missing:  # pgeocode only for ZIPs the prebuilt table doesn't know
+        df = geocoder().query_postal_code(missing)
+        found.update(zip(missing, zip(df.latitude.to_numpy(dtype=float), df.longitude.to_numpy(dtype=float))))
+    coords = np.array([found[z] for z in zips], dtype=float).reshape(-1, 2)
+    return coords[:, 0], coords[:, 1]
+
 def miles(lat1, lon1, lat2, lon2):
+    """Haversine distance in miles; lat2/lon2 may be NumPy arrays."""
     r = 3958.8
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlmb = math.radians(lon2 - lon1)
-    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlmb/2)**2
-    return 2 * r * math.asin(math.sqrt(a))
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = np.radians(np.subtract(lat2, lat1))
+    dlmb = np.radians(np.subtract(lon2, lon1))
+    a = np.sin(dphi/2)**2 + np.cos(phi1)*np.cos(phi2)*np.sin(dlmb/2)**2
+    return 2 * r * np.arcsin(np.sqrt(a))
 
 # Query params: Streamlit 1.32+ has st.query_params; older versions: experimental fallback
 def _get_query_params():
@@ -121,6 +156,19 @@ if primary_spec:
 NPI_API = "https://npiregistry.cms.hhs.gov/api/"
 NPI_VERSION = "2.1"
 
+@st.cache_resource
+def npi_session():
+    """Keep-alive session shared across searches; retries transient 429/5xx with backoff."""
+    s = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        raise_on_status=False,  # let raise_for_status() report the final status
+    )
+    s.mount("https://", HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=8))
+    return s
+
 @st.cache_data(ttl=600, show_spinner=False)
 def npi_search_state(taxonomy_desc: str, state: str, enum_type: str, limit: int = 1200):
     """Search NPI Registry by state + taxonomy; enum_type: 'NPI-1' or 'NPI-2'."""
@@ -132,7 +180,7 @@ def npi_search_state(taxonomy_desc: str, state: str, enum_type: str, limit: int
         "enumeration_type": enum_type,
         "limit": min(max(limit, 1), 1200),
     }
-    r = requests.get(NPI_API, params=params, timeout=25)
+    r = npi_session().get(NPI_API, params=params, timeout=25)
     r.raise_for_status()
     return r.json()
 
@@ -145,10 +193,19 @@ def search_radius_by_state_then_filter(user_zip: str, radius: int, specialty_tex
     if not state:
         return [], {"reason": "Could not infer state from ZIP."}
 
+    # Fire both lookups at once so the organization fallback costs no extra
+    # round-trip; we only wait on NPI-2 if NPI-1 comes back empty.
+    ex = ThreadPoolExecutor(max_workers=2)
+    futures = [
+        ex.submit(npi_search_state, specialty_text, state, enum_type=enum, limit=1200)
+        for enum in ("NPI-1", "NPI-2")
+    ]
+    ex.shutdown(wait=False)
+
     all_hits = []
     # Prefer individuals (NPI-1), then organizations (NPI-2)
-    for enum in ["NPI-1", "NPI-2"]:
-        data = npi_search_state(specialty_text, state, enum_type=enum, limit=1200)
+    for fut in futures:
+        data = fut.result()
         results = data.get("results") or []
         if not results:
             continue
@@ -161,10 +218,6 @@ def search_radius_by_state_then_filter(user_zip: str, radius: int, specialty_tex
                   or (addr_list[0] if addr_list else {})
             zip5 = (loc.get("postal_code","") or "")[:5]
 
-            # Distance calc (zip centroid to zip centroid)
-            latlon = geocode_zip(zip5) if zip5 else None
-            dist = miles(u_lat, u_lon, latlon[0], latlon[1]) if latlon else None
-
             phone = (loc.get("telephone_number") or
                      next((a.get("telephone_number") for a in addr_list if a.get("telephone_number")), None))
 
@@ -183,8 +236,18 @@ def search_radius_by_state_then_filter(user_zip: str, radius: int, specialty_tex
                 "address": f"{loc.get('address_1','')} {loc.get('address_2','')}, "
                            f"{loc.get('city','')}, {loc.get('state','')} {zip5}".strip(),
                 "zip": zip5,
-                "distance_mi": round(dist, 1) if dist is not None else None,
+                "distance_mi": None,
             })
+
+        # Distance calc (zip centroid to zip centroid), one vectorized pass per unique ZIP
+        uniq_zips = sorted({row["zip"] for row in rows if row["zip"]})
+        lats, lons = geocode_zips(uniq_zips)
+        dist_by_zip = dict(zip(uniq_zips, miles(u_lat, u_lon, lats, lons)))
+        for row in rows:
+            dist = dist_by_zip.get(row["zip"])
+            if dist is not None and not np.isnan(dist):
+                row["distance_mi"] = round(float(dist), 1)
+
         all_hits.extend(rows)
         if all_hits:
             break
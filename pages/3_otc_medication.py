@@ -1,7 +1,7 @@
-import os, json, textwrap
+import os, re, json, random, textwrap, time, hashlib, queue
+from concurrent.futures import ThreadPoolExecutor
+import diskcache
 import streamlit as st
-from PIL import Image
-from openai import OpenAI
 
 
 st.set_page_config(
@@ -11,116 +11,191 @@ st.set_page_config(
 )
 
 
-# --- Header images (unchanged) ---
-col1, col2 = st.columns([1, 1])
-with col1:
-    image = Image.open("assets/h4u_logo.png")
-    st.image(image.resize((600, 250)))
-with col2:
-    image = Image.open("assets/otc.png")
-    st.image(image.resize((600, 350)))
+# ----------------- OpenAI call -----------------
+OPENAI_ATTEMPTS = 3
 
-st.title("💊 OTC Medication Suggestions & Pharma Offers")
+OTC_SYSTEM_MSG = (
+    "You are a careful, concise clinical assistant. "
+    "Provide OTC symptom-relief options only (no diagnosis). "
+    "Never give personalized dosing; give general label-based guidance only. "
+    "Flag dangerous symptoms and advise when to seek urgent/non-urgent care. "
+    "Be brief and practical; US OTC context."
+)
+# Dedented once at import; filled per call with str.format
+OTC_USER_TMPL = textwrap.dedent("""
+    USER PROFILE (if provided):
+    - Age: {age}
+    - Allergies: {allergies}
+    - Current Medications: {meds}
 
-condition_summary = st.session_state.get("condition_summary", "")
-if not condition_summary:
-    st.warning("⚠️ No suggestions found. Please run the symptom checker first.")
-    st.stop()
+    SYMPTOM SUMMARY (from app):
+    {summary}
 
-# ----------------- OpenAI call -----------------
-def get_otc_suggestions(symptom_summary: str, age: int | None = None, allergies: str | None = None, meds: str | None = None):
+    Reply as JSON: otc_recommendations (list of {{name, purpose, dosage_general, notes}}),
+    red_flags, when_to_seek_care, lifestyle (lists of strings).
+""").strip()
+
+OTC_CACHE_DIR = os.path.expanduser("~/.aiclinic_otc")
+OTC_CACHE_TTL = 3600
+
+@st.cache_resource
+def _otc_cache():
+    # On disk so answers survive container restarts. Not st.cache_data: the
+    # streaming call draws into a placeholder owned by the caller.
+    return diskcache.Cache(OTC_CACHE_DIR)
+
+def _otc_cache_key(*args) -> str:
+    return hashlib.blake2b(json.dumps(args, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+
+_RECS_START_RE = re.compile(r'"otc_recommendations"\s*:\s*\[')
+
+def _complete_recs(buf: str) -> list[dict]:
+    """Recommendation objects fully received so far in a streaming JSON buffer."""
+    m = _RECS_START_RE.search(buf)
+    if not m:
+        return []
+    decoder = json.JSONDecoder()
+    i, recs = m.end(), []
+    while True:
+        while i < len(buf) and buf[i] in " \t\r\n,":
+            i += 1
+        if i >= len(buf) or buf[i] != "{":
+            return recs
+        try:
+            obj, i = decoder.raw_decode(buf, i)
+        except ValueError:  # object still arriving
+            return recs
+        recs.append(obj)
+
+@st.cache_resource
+def _openai():
+    from openai import OpenAI  # imported on first use; a bounced visit never loads the SDK
+    return OpenAI(max_retries=0)  # uses OPENAI_API_KEY env var; retries handled in get_otc_suggestions
+
+def get_otc_suggestions(symptom_summary: str, age: int | None = None, allergies: str | None = None, meds: str | None = None,
+                        on_partial=None):
     """
     Returns dict with:
       - otc_recommendations: list[{name, purpose, dosage_general, notes}]
       - red_flags: list[str]
       - when_to_seek_care: list[str]
       - lifestyle: list[str]
+    While streaming, on_partial(recs) is called each time another recommendation completes.
+    Returns None without an API key; OpenAI errors propagate to the caller. A reply
+    truncated at max_tokens yields just the recommendations that completed.
     """
     # If no API key, return fallback
     if not os.getenv("OPENAI_API_KEY"):
         return None
 
-    client = OpenAI()  # uses OPENAI_API_KEY env var
+    key = _otc_cache_key(symptom_summary, age, allergies, meds)
+    cached = _otc_cache().get(key)
+    if cached is not None:
+        return cached
 
-    system_msg = (
-        "You are a careful, concise clinical assistant. "
-        "Provide OTC symptom-relief options only (no diagnosis). "
-        "Never give personalized dosing; give general label-based guidance only. "
-        "Flag dangerous symptoms and advise when to seek urgent/non-urgent care. "
-        "Be brief and practical; US OTC context."
-    )
-    user_msg = textwrap.dedent(f"""
-    USER PROFILE (if provided):
-    - Age: {age if age else "unknown"}
-    - Allergies: {allergies or "unknown"}
-    - Current Medications: {meds or "unknown"}
+    from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+    # Worth retrying; anything else (e.g. BadRequestError) fails on the first try
+    transient_errors = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+    client = _openai()
 
-    SYMPTOM SUMMARY (from app):
-    {symptom_summary}
-
-    OUTPUT STRICTLY AS COMPACT JSON with keys:
-    {{
-      "otc_recommendations": [
-        {{"name": "...", "purpose": "...", "dosage_general": "...", "notes": "..."}}
-      ],
-      "red_flags": ["..."],
-      "when_to_seek_care": ["..."],
-      "lifestyle": ["..."]
-    }}
-    """).strip()
+    user_msg = OTC_USER_TMPL.format(
+        age=age if age else "unknown",
+        allergies=allergies or "unknown",
+        meds=meds or "unknown",
+        summary=symptom_summary,
+    )
 
+    for attempt in range(OPENAI_ATTEMPTS):
+        try:
+            stream = client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "system", "content": OTC_SYSTEM_MSG},
+                          {"role": "user", "content": user_msg}],
+                temperature=0.2,
+                max_tokens=600,
+                response_format={"type": "json_object"},  # valid JSON only, no prose to strip
+                stream=True,
+            )
+            break
+        except transient_errors:
+            if attempt == OPENAI_ATTEMPTS - 1:
+                raise
+            # exponential backoff with jitter: ~0.5s, ~1s
+            time.sleep(0.5 * 2 ** attempt + random.random() * 0.25)
+    buf, shown, finish = "", 0, None
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        finish = chunk.choices[0].finish_reason or finish
+        if not chunk.choices[0].delta.content:
+            continue
+        buf += chunk.choices[0].delta.content
+        if on_partial:
+            recs = _complete_recs(buf)
+            if len(recs) > shown:
+                shown = len(recs)
+                on_partial(recs)
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "system", "content": system_msg},
-                      {"role": "user", "content": user_msg}],
-            temperature=0.2,
-        )
-        content = resp.choices[0].message.content
-        # Extract JSON (in case the model adds extra text)
-        start = content.find("{")
-        end = content.rfind("}")
-        data = json.loads(content[start:end+1])
-        return data
-    except Exception as e:
-        st.warning(f"OTC assistant unavailable ({e}). Showing a generic list instead.")
-        return None
+        data = None if finish == "length" else json.loads(buf)
+    except ValueError:
+        data = None
+    if data is None:
+        # Cut off at max_tokens (or malformed): keep the cards that already streamed
+        # in instead of swapping them for the generic list, and don't cache it
+        return {"otc_recommendations": _complete_recs(buf)}
+    _otc_cache().set(key, data, expire=OTC_CACHE_TTL)
+    return data
 
+@st.cache_resource
+def _executor():
+    return ThreadPoolExecutor(max_workers=4)
+
+# Kick off the OpenAI call before drawing anything so it overlaps page rendering
+condition_summary = st.session_state.get("condition_summary", "")
 # Optional: capture a bit more context if you store these in session
 age = st.session_state.get("age")
 allergies = st.session_state.get("allergies")
 meds = st.session_state.get("meds")
 
-with st.spinner("Asking AI for OTC suggestions…"):
-    suggestions = get_otc_suggestions(condition_summary, age=age, allergies=allergies, meds=meds)
+partials = queue.Queue()  # worker thread can't touch Streamlit; cards are drawn from here
+if condition_summary:
+    # create shared handles on the script thread (OpenAI() raises without a key)
+    _otc_cache()
+    if os.getenv("OPENAI_API_KEY"):
+        _openai()
+    otc_future = _executor().submit(get_otc_suggestions, condition_summary, age, allergies, meds, partials.put)
+
+# --- Header images (pre-sized by scripts/build_assets.py) ---
+col1, col2 = st.columns([1, 1])
+with col1:
+    st.image("assets/h4u_logo_600x250.jpg")
+with col2:
+    st.image("assets/otc_600x350.png")
+
+st.title("💊 OTC Medication Suggestions & Pharma Offers")
+
+if not condition_summary:
+    st.warning("⚠️ No suggestions found. Please run the symptom checker first.")
+    st.stop()
 
 # ----------------- Render -----------------
 st.markdown("### Your Possible Suggestions:")
 st.write(condition_summary)
 
 st.markdown("### Suggested OTC Medications (AI-assisted)")
-if suggestions and suggestions.get("otc_recommendations"):
-    for rec in suggestions["otc_recommendations"]:
-        with st.container(border=True):
-            st.markdown(f"**{rec.get('name','')}** — {rec.get('purpose','')}")
-            st.markdown(f"- *General label guidance:* {rec.get('dosage_general','')}")
-            if rec.get("notes"):
-                st.markdown(f"- *Notes/Cautions:* {rec['notes']}")
-else:
-    # Fallback if API/key failed
-    st.markdown("- Acetaminophen — reduces fever & aches. Use per label.")
-    st.markdown("- Ibuprofen — reduces pain/inflammation (avoid if sensitive to NSAIDs).")
-    st.markdown("- Saline nasal spray — helps congestion/dryness.")
-    st.markdown("- Cough drops — soothe throat irritation.")
-
-# Red flags & care guidance
-if suggestions:
-    if suggestions.get("red_flags"):
-        st.warning("**Red flags** (if present, seek medical advice):\n- " + "\n- ".join(suggestions["red_flags"]))
-    if suggestions.get("when_to_seek_care"):
-        st.info("**When to seek care:**\n- " + "\n- ".join(suggestions["when_to_seek_care"]))
-    if suggestions.get("lifestyle"):
-        st.markdown("**Helpful non-drug measures:**\n- " + "\n- ".join(suggestions["lifestyle"]))
+# Reserved here, filled once the banners below are on screen
+ai_slot = st.container()
+with ai_slot:
+    recs_slot = st.empty()
+
+def render_recs(recs):
+    with recs_slot.container():
+        for rec in recs:
+            with st.container(border=True):
+                st.markdown(f"**{rec.get('name','')}** — {rec.get('purpose','')}")
+                st.markdown(f"- *General label guidance:* {rec.get('dosage_general','')}")
+                if rec.get("notes"):
+                    st.markdown(f"- *Notes/Cautions:* {rec['notes']}")
 
 st.markdown("---")
 st.markdown("## 🏷️ Pharma Offers")
@@ -130,7 +205,7 @@ with st.container(border=True):
     st.markdown("### 💊 Tylenol (Acetaminophen 500mg)")
     st.markdown("**FAST RELIEF for pain & inflammation**")
     st.markdown(":red[20% OFF – Limited Time Offer!]")
-    st.image("assets/20% OFF Pain Relief Offer.png", width=250)
+    st.image("assets/20% OFF Pain Relief Offer_250x166.jpg")
     st.caption("Always read the label and use as directed.")
 
 # Tylenol Banner
@@ -139,10 +214,44 @@ with st.container(border=True):
     st.markdown("### 💊 Ibuprofen 200mg")
     st.markdown("**GENTLE ON STOMACH, STRONG ON PAIN**")
     st.markdown(":green[Buy 1, Get 1 Half Off!]")
-    st.image("assets/Ibuprofen Buy One, Get One Free.png", width=250)         
+    st.image("assets/Ibuprofen Buy One, Get One Free_250x166.jpg")         
     st.caption("For occasional pain relief. Consult a healthcare professional if symptoms persist.")
 
 
 st.caption("⚠️ Educational suggestions for symptom relief only — not a diagnosis. Always read labels and consult a pharmacist/clinician, especially for children, pregnancy, chronic illness, or drug interactions.")
 st.page_link("pages/1_symptoms.py", label="Return to Symptom Checker", icon="🩺")
 
+# ----------------- AI block (waits on the background request) -----------------
+with ai_slot:
+    # Cards appear as each recommendation finishes streaming
+    with st.spinner("Asking AI for OTC suggestions…"):
+        while True:
+            try:
+                render_recs(partials.get(timeout=0.1))
+            except queue.Empty:
+                if otc_future.done():
+                    break
+        try:
+            suggestions = otc_future.result()
+        except Exception as e:
+            st.warning(f"OTC assistant unavailable ({e}). Showing a generic list instead.")
+            suggestions = None
+
+    if suggestions and suggestions.get("otc_recommendations"):
+        render_recs(suggestions["otc_recommendations"])
+    else:
+        # Fallback if API/key failed
+        with recs_slot.container():
+            st.markdown("- Acetaminophen — reduces fever & aches. Use per label.")
+            st.markdown("- Ibuprofen — reduces pain/inflammation (avoid if sensitive to NSAIDs).")
+            st.markdown("- Saline nasal spray — helps congestion/dryness.")
+            st.markdown("- Cough drops — soothe throat irritation.")
+
+    # Red flags & care guidance
+    if suggestions:
+        if suggestions.get("red_flags"):
+            st.warning("**Red flags** (if present, seek medical advice):\n- " + "\n- ".join(suggestions["red_flags"]))
+        if suggestions.get("when_to_seek_care"):
+            st.info("**When to seek care:**\n- " + "\n- ".join(suggestions["when_to_seek_care"]))
+        if suggestions.get("lifestyle"):
+            st.markdown("**Helpful non-drug measures:**\n- " + "\n- ".join(suggestions["lifestyle"]))
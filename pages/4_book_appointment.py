@@ -1,7 +1,6 @@
 # pages/4_book_appointment.py
 import streamlit as st
 from datetime import date, time
-from PIL import Image
 
 st.set_page_config(
     page_title="AI Clinic | Book An Appointment",
@@ -12,14 +11,10 @@ st.set_page_config(
 col1, col2 = st.columns([1, 1])  # two equal-width columns
 with col1:
     #st.image("assets/appoint.jpg", use_container_width=True)
-    image = Image.open("assets/h4u_logo.png") 
-    resized_image = image.resize((600, 250)) 
-    st.image(resized_image) 
+    st.image("assets/h4u_logo_600x250.jpg")  # pre-sized by scripts/build_assets.py
 with col2:
     #st.image("assets/h4u_logo.png", use_container_width=True)
-    image = Image.open("assets/appoint2.jpg") 
-    resized_image = image.resize((600,350)) # Width x Height in pixels
-    st.image(resized_image)
+    st.image("assets/appoint2_600x350.jpg")
 
 
 
@@ -1,13 +1,11 @@
 # pages/5_pharmacies_nearby.py
 import os
+import functools
 import math
 import re
 import time
-import requests
 import streamlit as st
-import pgeocode
 import urllib.parse
-from PIL import Image
 
 st.set_page_config(
     page_title="AI Clinic | Pharmacies Nearby",
@@ -15,35 +13,35 @@ st.set_page_config(
     layout="wide"
 )
 
-# ---------- Header (two images) ----------
+# ---------- Header (two images, pre-sized by scripts/build_assets.py) ----------
 col1, col2 = st.columns([1, 1])
 with col1:
-    image = Image.open("assets/h4u_logo.png")
-    st.image(image.resize((600, 250)))
+    st.image("assets/h4u_logo_600x250.jpg")
 with col2:
-    image = Image.open("assets/pharma.jpg")
-    st.image(image.resize((600, 350)))
+    st.image("assets/pharma_600x350.jpg")
 
 st.title("🏪 Pharmacies Near You")
 
 # ---------- Helpers ----------
+_HAS_LINK_BUTTON = hasattr(st, "link_button")  # Streamlit 1.27+
+_LINK_STYLE_BASE = (
+    "display:inline-block;padding:0.6rem 1rem;border-radius:0.5rem;"
+    "text-decoration:none;background:#f0f2f6;color:#111;font-weight:600;"
+    "border:1px solid #d0d3da;"
+)
+_LINK_STYLE_FULL = _LINK_STYLE_BASE + "width:100%;text-align:center;"
+
+@functools.lru_cache(maxsize=512)
+def _link_html(label: str, url: str, fill_width: bool) -> str:
+    # Tabs repeat the same cards, so the same buttons recur within a run
+    style = _LINK_STYLE_FULL if fill_width else _LINK_STYLE_BASE
+    return f'<a href="{url}" target="_blank" rel="noopener noreferrer" style="{style}">{label}</a>'
+
 def link_btn(label: str, url: str, *, fill_width: bool = True):
-    try:
+    """Prefer Streamlit link_button; fallback to a styled <a> for older versions."""
+    if _HAS_LINK_BUTTON:
         return st.link_button(label, url, use_container_width=fill_width)
-    except Exception:
-        style = (
-            "display:inline-block;padding:0.6rem 1rem;border-radius:0.5rem;"
-            "text-decoration:none;background:#f0f2f6;color:#111;font-weight:600;"
-            "border:1px solid #d0d3da;width:100%;text-align:center;"
-        ) if fill_width else (
-            "display:inline-block;padding:0.6rem 1rem;border-radius:0.5rem;"
-            "text-decoration:none;background:#f0f2f6;color:#111;font-weight:600;"
-            "border:1px solid #d0d3da;"
-        )
-        st.markdown(
-            f'<a href="{url}" target="_blank" rel="noopener noreferrer" style="{style}">{label}</a>',
-            unsafe_allow_html=True,
-        )
+    st.markdown(_link_html(label, url, fill_width), unsafe_allow_html=True)
 
 def _zip5(z: str | None) -> str | None:
     if not z:
@@ -74,6 +72,7 @@ st.caption(f"Searching pharmacies near ZIP {zip5_user} for {first_name or 'you'}
 # ---------- Geocoding (ZIP → lat/lon) ----------
 @st.cache_resource
 def geocoder():
+    import pgeocode  # pulls in pandas; only paid once a ZIP is actually looked up
     return pgeocode.Nominatim("us")
 
 @st.cache_data(ttl=900, show_spinner=False)
@@ -103,9 +102,19 @@ if not GOOGLE_API_KEY:
 PLACES_NEARBY_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
 PLACE_DETAILS_URL = "https://maps.googleapis.com/maps/api/place/details/json"
 
+@st.cache_resource
+def _http():
+    """Keep-alive session shared across reruns and users."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    s = requests.Session()
+    s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return s
+
 def _call_places(params):
     """One call wrapper with basic status handling."""
-    r = requests.get(PLACES_NEARBY_URL, params=params, timeout=30)
+    r = _http().get(PLACES_NEARBY_URL, params=params, timeout=30)
     data = r.json()
     status = data.get("status")
     if status not in ("OK", "ZERO_RESULTS"):
@@ -142,25 +151,27 @@ def places_nearby_type_or_keyword(lat: float, lon: float, radius_m: int, *, plac
             break
     return results
 
+# Built once; only place_id varies per Details call
+_DETAILS_PARAMS_BASE = {
+    "key": GOOGLE_API_KEY,
+    "fields": ",".join([
+        "name",
+        "formatted_address",
+        "formatted_phone_number",
+        "geometry/location",
+        "opening_hours",
+        "current_opening_hours",
+        "website",
+        "url",
+        "business_status",
+        "types"
+    ]),
+}
+
 @st.cache_data(ttl=1200, show_spinner=False)
 def place_details(place_id: str):
-    params = {
-        "key": GOOGLE_API_KEY,
-        "place_id": place_id,
-        "fields": ",".join([
-            "name",
-            "formatted_address",
-            "formatted_phone_number",
-            "geometry/location",
-            "opening_hours",
-            "current_opening_hours",
-            "website",
-            "url",
-            "business_status",
-            "types"
-        ]),
-    }
-    return requests.get(PLACE_DETAILS_URL, params=params, timeout=30).json().get("result", {})
+    params = {**_DETAILS_PARAMS_BASE, "place_id": place_id}
+    return _http().get(PLACE_DETAILS_URL, params=params, timeout=30).json().get("result", {})
 
 def is_24_hours(opening: dict | None) -> bool:
     if not opening:
@@ -255,9 +266,13 @@ base_items = merge_dedupe(base_items)
 # Sort by distance then name
 base_items.sort(key=lambda x: (x["distance_mi"], x["name"]))
 
-# Fetch details for candidates we'll display
-detail_take = min(len(base_items), max(how_many * 3, how_many + 15))
-picked = base_items[:detail_take]
+# Fetch details only for candidates a tab can display: the nearest overall (also
+# the pool for "Open 24 hours", which needs Details hours) plus the nearest that
+# Nearby already reports open, for the "Open now" tab
+detail_take = how_many + 5
+open_first = [x for x in base_items if x.get("open_now") is True][:detail_take]
+wanted = {id(x) for x in base_items[:detail_take] + open_first}
+picked = [x for x in base_items if id(x) in wanted]
 
 details_by_id = {}
 for x in picked:
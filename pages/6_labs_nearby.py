@@ -1,13 +1,13 @@
 # pages/6_labs_nearby.py
 import os
+import functools
+import logging
 import math
+import pickle
 import re
-import time
-import requests
+import numpy as np
 import streamlit as st
-import pgeocode
 import urllib.parse
-from PIL import Image
 
 st.set_page_config(
     page_title="AI Clinic | Labs Nearby",
@@ -16,51 +16,54 @@ st.set_page_config(
 )
 
 
-# ---------- Header (two images) ----------
+# ---------- Header (two images, pre-sized by scripts/build_assets.py) ----------
 col1, col2 = st.columns([1, 1])
 with col1:
-    image = Image.open("assets/h4u_logo.png")
-    st.image(image.resize((600, 250)))
+    st.image("assets/h4u_logo_600x250.jpg")
 with col2:
-    image = Image.open("assets/ai_doctor_hero5.jpg")
-    st.image(image.resize((600, 350)))
+    st.image("assets/ai_doctor_hero5_600x350.jpg")
 
 st.title("🧪 Medical Labs Near You")
 #This is a Test!
 
 # ---------- Helpers ----------
+_ZIP5_RE = re.compile(r"^\s*(\d{5})(?:-\d{4})?\s*$")
+_PHONE_STRIP_RE = re.compile(r"[^\d+]")
+
+_HAS_LINK_BUTTON = hasattr(st, "link_button")  # Streamlit 1.27+
+_LINK_STYLE_BASE = (
+    "display:inline-block;padding:0.6rem 1rem;border-radius:0.5rem;"
+    "text-decoration:none;background:#f0f2f6;color:#111;font-weight:600;"
+    "border:1px solid #d0d3da;"
+)
+_LINK_STYLE_FULL = _LINK_STYLE_BASE + "width:100%;text-align:center;"
+
+@functools.lru_cache(maxsize=512)
+def _link_html(label: str, url: str, fill_width: bool) -> str:
+    # Tabs repeat the same cards, so the same buttons recur within a run
+    style = _LINK_STYLE_FULL if fill_width else _LINK_STYLE_BASE
+    return f'<a href="{url}" target="_blank" rel="noopener noreferrer" style="{style}">{label}</a>'
+
 def link_btn(label: str, url: str, *, fill_width: bool = True):
     """Prefer Streamlit link_button; fallback to a styled <a> for older versions."""
-    try:
+    if _HAS_LINK_BUTTON:
         return st.link_button(label, url, use_container_width=fill_width)
-    except Exception:
-        style = (
-            "display:inline-block;padding:0.6rem 1rem;border-radius:0.5rem;"
-            "text-decoration:none;background:#f0f2f6;color:#111;font-weight:600;"
-            "border:1px solid #d0d3da;width:100%;text-align:center;"
-        ) if fill_width else (
-            "display:inline-block;padding:0.6rem 1rem;border-radius:0.5rem;"
-            "text-decoration:none;background:#f0f2f6;color:#111;font-weight:600;"
-            "border:1px solid #d0d3da;"
-        )
-        st.markdown(
-            f'<a href="{url}" target="_blank" rel="noopener noreferrer" style="{style}">{label}</a>',
-            unsafe_allow_html=True,
-        )
+    st.markdown(_link_html(label, url, fill_width), unsafe_allow_html=True)
 
 def _zip5(z: str | None) -> str | None:
     if not z:
         return None
-    m = re.match(r"^\s*(\d{5})(?:-\d{4})?\s*$", z)
+    m = _ZIP5_RE.match(z)
     return m.group(1) if m else None
 
 def haversine_miles(lat1, lon1, lat2, lon2):
+    """Haversine distance in miles; lat2/lon2 may be NumPy arrays."""
     r = 3958.8
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlmb = math.radians(lon2 - lon1)
-    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlmb/2)**2
-    return 2 * r * math.asin(math.sqrt(a))
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = np.radians(np.subtract(lat2, lat1))
+    dlmb = np.radians(np.subtract(lon2, lon1))
+    a = np.sin(dphi/2)**2 + np.cos(phi1)*np.cos(phi2)*np.sin(dlmb/2)**2
+    return 2 * r * np.arcsin(np.sqrt(a))
 
 # ---------- Session inputs from Symptom Checker ----------
 zip_code = st.session_state.get("zip_code", "")
@@ -75,12 +78,33 @@ if not zip5_user:
 st.caption(f"Searching **medical labs near ZIP {zip5_user}** for {first_name or 'you'} using Google Maps.")
 
 # ---------- Geocoding (ZIP → lat/lon) ----------
+# Prebuilt by scripts/build_zip_centroids.py (shared with Find a Doctor)
+ZIP_CENTROIDS_PATH = "assets/zip_centroids.pkl"
+
+@st.cache_resource
+def zip_centroids() -> dict:
+    """{zip5: (lat, lon, state)} loaded once per process; empty if the asset is missing."""
+    try:
+        with open(ZIP_CENTROIDS_PATH, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError) as e:
+        # cache_resource runs this once per process, so this warns once
+        logging.getLogger(__name__).warning(
+            "ZIP centroid table unavailable (%s); falling back to pgeocode. "
+            "Run scripts/build_zip_centroids.py to rebuild it.", e)
+        return {}
+
 @st.cache_resource
 def geocoder():
+    # Only built when a ZIP is missing from the prebuilt table
+    import pgeocode
     return pgeocode.Nominatim("us")
 
 @st.cache_data(ttl=900, show_spinner=False)
 def geocode_zip(z5: str):
+    hit = zip_centroids().get(z5)
+    if hit:
+        return hit[0], hit[1]
     rec = geocoder().query_postal_code(z5)
     try:
         lat, lon = float(rec.latitude), float(rec.longitude)
@@ -97,105 +121,103 @@ if not geo:
 
 user_lat, user_lon = geo
 
-# ---------- Google Places (Nearby + Details) ----------
+# ---------- Google Places (API New: searchNearby) ----------
 GOOGLE_API_KEY = st.secrets.get("GOOGLE_MAPS_API_KEY") or os.environ.get("GOOGLE_MAPS_API_KEY")
 if not GOOGLE_API_KEY:
     st.error("Missing Google Maps API key. Set GOOGLE_MAPS_API_KEY in Streamlit secrets or env.")
     st.stop()
 
-PLACES_NEARBY_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-PLACE_DETAILS_URL = "https://maps.googleapis.com/maps/api/place/details/json"
+PLACES_NEARBY_URL = "https://places.googleapis.com/v1/places:searchNearby"
+# Everything the cards need comes back in the one call, so no per-place Details lookups
+PLACES_FIELD_MASK = ",".join([
+    "places.id",
+    "places.displayName",
+    "places.formattedAddress",
+    "places.location",
+    "places.nationalPhoneNumber",
+    "places.websiteUri",
+    "places.googleMapsUri",
+    "places.regularOpeningHours",
+    "places.currentOpeningHours",
+])
+MAX_RESULTS = 20  # searchNearby hard cap; there is no pagination
+_PLACES_HEADERS = {
+    "X-Goog-Api-Key": GOOGLE_API_KEY,
+    "X-Goog-FieldMask": PLACES_FIELD_MASK,
+}
+
+@st.cache_resource
+def _http():
+    """Keep-alive session shared across reruns and users."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    s = requests.Session()
+    s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return s
 
 @st.cache_data(ttl=600, show_spinner=False)
-def places_nearby_labs(lat: float, lon: float, radius_m: int, max_pages: int = 3):
+def places_nearby_labs(lat: float, lon: float, radius_m: int):
     """
-    Query Google Places Nearby for labs using type=health + keyword=laboratory.
-    Returns up to ~60 results (3 pages).
+    Query Places API (New) searchNearby for medical labs, nearest first.
+    Returns up to 20 places with address, phone, website and hours included.
     """
-    params = {
-        "key": GOOGLE_API_KEY,
-        "location": f"{lat},{lon}",
-        "radius": radius_m,
-        "type": "health",            # closest type bucket for labs
-        "keyword": "laboratory",     # keyword to target diagnostic/medical labs
+    body = {
+        "includedTypes": ["medical_lab"],
+        "maxResultCount": MAX_RESULTS,
+        "rankPreference": "DISTANCE",
+        "locationRestriction": {
+            "circle": {
+                "center": {"latitude": lat, "longitude": lon},
+                "radius": float(radius_m),
+            }
+        },
     }
-    results = []
-    page = 0
-    token = None
-    while page < max_pages:
-        if token:
-            params["pagetoken"] = token
-            time.sleep(2)  # required delay before using next_page_token
-        resp = requests.get(PLACES_NEARBY_URL, params=params, timeout=30).json()
-        results.extend(resp.get("results", []))
-        token = resp.get("next_page_token")
-        page += 1
-        if not token:
-            break
-    return results
-
-@st.cache_data(ttl=1200, show_spinner=False)
-def place_details(place_id: str):
-    params = {
-        "key": GOOGLE_API_KEY,
-        "place_id": place_id,
-        "fields": ",".join([
-            "name",
-            "formatted_address",
-            "formatted_phone_number",
-            "geometry/location",
-            "opening_hours",
-            "current_opening_hours",
-            "website",
-            "url"
-        ]),
-    }
-    return requests.get(PLACE_DETAILS_URL, params=params, timeout=30).json().get("result", {})
+    resp = _http().post(PLACES_NEARBY_URL, json=body, headers=_PLACES_HEADERS, timeout=30).json()
+    if "error" in resp:
+        st.warning(f"Google Places error: {resp['error'].get('message', 'unknown error')}")
+        return []
+    return resp.get("places", [])
 
 def is_24_hours(opening: dict | None) -> bool:
     """
     Heuristic for 24/7:
-    - Any weekday_text line with 'Open 24 hours'
-    - Any period spans 00:00–24:00 (or close missing)
+    - Any weekdayDescriptions line with 'Open 24 hours'
+    - A period opening at 00:00 with no close (how the API encodes always-open)
     """
     if not opening:
         return False
-    texts = opening.get("weekday_text") or []
-    for t in texts:
+    for t in opening.get("weekdayDescriptions") or []:
         if "open 24 hours" in t.lower():
             return True
-    periods = opening.get("periods") or []
-    for p in periods:
-        o = (p.get("open") or {})
-        c = (p.get("close") or {})
-        if o.get("time") == "0000" and (c.get("time") in ("0000", "2400") or not c):
+    for p in opening.get("periods") or []:
+        o = p.get("open") or {}
+        if o.get("hour", 0) == 0 and o.get("minute", 0) == 0 and not p.get("close"):
             return True
-    # Also consider nested 'current_opening_hours'
-    curr = opening.get("current_opening_hours") if isinstance(opening, dict) and "current_opening_hours" in opening else None
-    if curr and is_24_hours(curr):
-        return True
     return False
 
-def normalize_google_place(p: dict, lat0: float, lon0: float):
-    pid = p.get("place_id")
-    name = p.get("name") or "(Lab)"
-    loc = (p.get("geometry") or {}).get("location") or {}
-    plat, plon = loc.get("lat"), loc.get("lng")
-    dist = None
-    if plat is not None and plon is not None:
-        dist = round(haversine_miles(float(plat), float(plon), lat0, lon0), 1)
-    addr = p.get("vicinity") or p.get("formatted_address") or ""
-    open_now = (p.get("opening_hours") or {}).get("open_now")
-    map_url = f"https://www.google.com/maps/place/?q=place_id:{pid}" if pid else \
-              f"https://www.google.com/maps/search/?api=1&query={urllib.parse.quote_plus(name)}"
+def normalize_google_place(p: dict, dist: float | None):
+    pid = p.get("id")
+    name = (p.get("displayName") or {}).get("text") or "(Lab)"
+    hours = p.get("currentOpeningHours") or p.get("regularOpeningHours") or {}
+    phone = p.get("nationalPhoneNumber") or ""
+    map_url = p.get("googleMapsUri") or (
+        f"https://www.google.com/maps/place/?q=place_id:{pid}" if pid else
+        f"https://www.google.com/maps/search/?api=1&query={urllib.parse.quote_plus(name)}"
+    )
 
     return {
         "place_id": pid,
         "name": name,
-        "address": addr,
+        "address": p.get("formattedAddress") or "",
         "distance_mi": dist,
-        "open_now": open_now,
+        "open_now": hours.get("openNow"),
         "maps_url": map_url,
+        "phone_display": phone,
+        "phone_tel": ("tel:" + _PHONE_STRIP_RE.sub("", phone)) if phone else "",
+        "website": p.get("websiteUri") or "",
+        "weekday_text": hours.get("weekdayDescriptions") or [],
+        "is_24h": is_24_hours(p.get("regularOpeningHours")) or is_24_hours(p.get("currentOpeningHours")),
     }
 
 # ---------- Controls ----------
@@ -203,7 +225,7 @@ c1, c2 = st.columns([1, 1])
 with c1:
     radius_miles = st.slider("Search radius (miles)", 1, 25, 10, 1, help="How far around your ZIP center to look.")
 with c2:
-    how_many = st.selectbox("Show how many (nearest)", [5, 10, 15, 20, 30, 50], index=1)
+    how_many = st.selectbox("Show how many (nearest)", [5, 10, 15, 20], index=1)
 
 go = st.button("🔎 Search Labs")
 if not go:
@@ -218,44 +240,17 @@ with st.spinner("Querying Google Places for labs…"):
         st.stop()
 
 # Normalize and sort
-base_items = [normalize_google_place(el, user_lat, user_lon) for el in raw]
-base_items = [x for x in base_items if x.get("distance_mi") is not None]
-base_items.sort(key=lambda x: (x["distance_mi"], x["name"]))
-
-# Fetch Details for items we might display (overfetch so each tab has enough)
-detail_take = min(len(base_items), max(how_many * 2, how_many + 10))
-picked = base_items[:detail_take]
-details_by_id = {}
-for x in picked:
-    if x["place_id"]:
-        try:
-            details_by_id[x["place_id"]] = place_details(x["place_id"])
-        except Exception:
-            details_by_id[x["place_id"]] = {}
-
-def enrich(item):
-    d = details_by_id.get(item["place_id"], {})
-    addr = d.get("formatted_address") or item["address"]
-    phone = d.get("formatted_phone_number") or ""
-    website = d.get("website") or ""
-    open_struct = d.get("current_opening_hours") or d.get("opening_hours") or {}
-    open_texts = open_struct.get("weekday_text") or []
-    open_now = open_struct.get("open_now", item.get("open_now"))
-    twenty_four = is_24_hours({"weekday_text": open_texts, "periods": open_struct.get("periods", [])})
-    maps_url = d.get("url") or item["maps_url"]
-    return {
-        **item,
-        "address": addr,
-        "phone_display": phone,
-        "phone_tel": ("tel:" + re.sub(r"[^\d+]", "", phone)) if phone else "",
-        "website": website,
-        "open_now": open_now,
-        "weekday_text": open_texts,
-        "is_24h": twenty_four,
-        "maps_url": maps_url,
-    }
-
-enriched = [enrich(it) for it in picked]
+# Distances for every result in one vectorized pass; NaN where Google gave no location
+lats = np.fromiter(((el.get("location") or {}).get("latitude", np.nan) for el in raw), dtype=np.float64, count=len(raw))
+lons = np.fromiter(((el.get("location") or {}).get("longitude", np.nan) for el in raw), dtype=np.float64, count=len(raw))
+dist_mi = haversine_miles(user_lat, user_lon, lats, lons).round(1)
+base_items = [
+    normalize_google_place(el, None if np.isnan(d) else float(d))
+    for el, d in zip(raw, dist_mi)
+]
+# (distance, name) order from the same distance array; places without a location are dropped
+order = np.lexsort((np.array([x["name"] for x in base_items]), dist_mi))
+base_items = [base_items[i] for i in order if not np.isnan(dist_mi[i])]
 
 # ---------- Tabs: All / Open now / Open 24 hours ----------
 tab_all, tab_open, tab_24 = st.tabs(["All", "Open now", "Open 24 hours"])
@@ -296,17 +291,17 @@ def render_cards(items, limit):
                     link_btn("🌐 Website", p["website"], fill_width=True)
 
 with tab_all:
-    render_cards(enriched, how_many)
+    render_cards(base_items, how_many)
 
 with tab_open:
-    open_now_items = [p for p in enriched if p.get("open_now") is True]
+    open_now_items = [p for p in base_items if p.get("open_now") is True]
     if not open_now_items:
         st.info("No labs currently open found in this radius.")
     else:
         render_cards(open_now_items, how_many)
 
 with tab_24:
-    open_24_items = [p for p in enriched if p.get("is_24h")]
+    open_24_items = [p for p in base_items if p.get("is_24h")]
     if not open_24_items:
         st.info("No 'Open 24 hours' labs found from Google data here. Try a larger radius.")
     else:
@@ -2,20 +2,20 @@
 """
 Contact Us (Standalone Page) — Microsoft Graph (app-only)
 Place this file in: pages/07_Contact_Us.py
-Requires: pip install streamlit msal requests
+Requires: pip install streamlit msal "httpx[http2]"
 """
 
 import os
+import re
 import time
 import json
+import asyncio
+import threading
 import urllib.parse
-from email.utils import formataddr
 from typing import Tuple
 
 import streamlit as st
-import requests
-import msal
-from PIL import Image
+import httpx
 
 
 # ---------------------------------------------------------------------
@@ -31,10 +31,9 @@ st.set_page_config(
 
 
 try:
-    image = Image.open("assets/h4u_logo.png")
-    st.image(image.resize((650, 225)))
+    st.image("assets/h4u_logo_650x225.jpg")  # pre-sized by scripts/build_assets.py
 except Exception:
-    st.info("Logo not found at assets/h4u_logo.png (optional).")
+    st.info("Logo not found at assets/h4u_logo_650x225.jpg (optional).")
 
 
 # Optional: tighten max width for consistency
@@ -52,7 +51,9 @@ st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 # Config loader: Streamlit secrets override env vars
 # ---------------------------------------------------------------------
 
+@st.cache_data(show_spinner=False, ttl=600)
 def load_cfg() -> dict:
+    """Secrets + env, parsed once per 10 min; call load_cfg.clear() after changing secrets."""
     keys = ["TENANT_ID", "CLIENT_ID", "CLIENT_SECRET", "SENDER", "CONTACT_TO", "APP_NAME"]
     cfg = {k: "" for k in keys}
 
@@ -76,6 +77,9 @@ def load_cfg() -> dict:
     if not cfg["APP_NAME"]:
         cfg["APP_NAME"] = "AI Clinic"
 
+    # Escaped once here rather than per send ("+" and friends in the mailbox name)
+    cfg["SEND_PATH"] = f"/users/{urllib.parse.quote(cfg['SENDER'], safe='@')}/sendMail"
+
     return cfg
 
 
@@ -85,66 +89,205 @@ def load_cfg() -> dict:
 
 GRAPH_SCOPE = ["https://graph.microsoft.com/.default"]
 GRAPH_BASE = "https://graph.microsoft.com/v1.0"
+GRAPH_BATCH_URL = f"{GRAPH_BASE}/$batch"
+
+# Refresh a little before Graph would reject the token
+TOKEN_REFRESH_MARGIN = 300
+
+@st.cache_resource
+def _msal_app(tenant_id: str, client_id: str, client_secret: str):
+    """One confidential client per app registration; its token cache lives with the process."""
+    import msal  # loaded on the first submit, not on every visit to the page
+    authority = f"https://login.microsoftonline.com/{tenant_id}"
+    return msal.ConfidentialClientApplication(
+        client_id, authority=authority, client_credential=client_secret
+    )
 
 def acquire_token(tenant_id: str, client_id: str, client_secret: str) -> Tuple[bool, str]:
-    """Acquire app-only token via client credentials."""
+    """Acquire app-only token via client credentials; reused until shortly before expiry."""
+    cached = st.session_state.get("_graph_tok")
+    if cached and cached["exp"] > time.time():
+        return True, cached["token"]
     try:
-        authority = f"https://login.microsoftonline.com/{tenant_id}"
-        app = msal.ConfidentialClientApplication(
-            client_id, authority=authority, client_credential=client_secret
-        )
-        result = app.acquire_token_for_client(scopes=GRAPH_SCOPE)
+        app = _msal_app(tenant_id, client_id, client_secret)
+        # Silent hit comes from MSAL's in-memory cache, shared by every session
+        result = app.acquire_token_silent(GRAPH_SCOPE, account=None) or \
+                 app.acquire_token_for_client(scopes=GRAPH_SCOPE)
         if "access_token" in result:
+            st.session_state["_graph_tok"] = {
+                "token": result["access_token"],
+                # built once per token, reused by every send and retry
+                "headers": {
+                    "Authorization": f"Bearer {result['access_token']}",
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                },
+                "exp": time.time() + int(result.get("expires_in", 0)) - TOKEN_REFRESH_MARGIN,
+            }
             return True, result["access_token"]
         # Bubble up a readable reason
-        return False, result.get("error_description", json.dumps(result))
+        return False, result.get("error_description") or json.dumps(result)
     except Exception as e:
         return False, f"Token error: {e}"
 
-def graph_send_mail(sender: str, to_addr: str, subject: str, body_text: str, token: str) -> Tuple[bool, str]:
+# Throttled (429) / unavailable (503) sends are retried; Graph says how long to wait
+GRAPH_RETRY_STATUSES = (429, 503)
+GRAPH_ATTEMPTS = 3
+
+@st.cache_resource
+def _event_loop():
+    # One long-lived loop per process: the cached AsyncClient's connection pool
+    # is bound to the loop it first ran on, so asyncio.run() per send would break it.
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="graph-loop", daemon=True).start()
+    return loop
+
+@st.cache_resource
+def _graph_client():
+    """HTTP/2 client to Graph; one TLS connection multiplexes every send."""
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(20, connect=3.05),
+        limits=httpx.Limits(max_keepalive_connections=4),
+    )
+
+def submit_async(coro):
+    """Schedule a coroutine on the shared loop; returns a concurrent.futures.Future."""
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop())
+
+@st.cache_resource
+def _graph_sem():
+    # Cap in-flight Graph calls process-wide so fan-outs don't trip mailbox throttling
+    return asyncio.Semaphore(4)
+
+graph_client = _graph_client()
+graph_sem = _graph_sem()
+
+async def _graph_post(url: str, **kwargs) -> httpx.Response:
+    async with graph_sem:
+        return await graph_client.post(url, **kwargs)
+
+def _mail_payload(to_addr: str, subject: str, body_text: str) -> dict:
+    return {
+        "message": {
+            "subject": subject,
+            "body": {"contentType": "Text", "content": body_text},
+            "toRecipients": [{"emailAddress": {"address": to_addr}}],
+        },
+        "saveToSentItems": True,
+    }
+
+def _json_bytes(obj) -> bytes:
+    # Compact and serialized once, so retries resend the same bytes
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+async def graph_send_mail(send_path: str, to_addr: str, subject: str, body_text: str, headers: dict) -> Tuple[bool, str]:
     """
     Send email via Graph app-only. Important:
     - Use /users/{sender}/sendMail (NOT /me/sendMail)
     - Do NOT include "from" in the JSON when using app-only.
     """
     try:
-        url = f"{GRAPH_BASE}/users/{sender}/sendMail"
-        payload = {
-            "message": {
-                "subject": subject,
-                "body": {"contentType": "Text", "content": body_text},
-                "toRecipients": [{"emailAddress": {"address": to_addr}}],
-            },
-            "saveToSentItems": True,
-        }
-        r = requests.post(
-            url,
-            json=payload,
-            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
-            timeout=20,
-        )
+        url = GRAPH_BASE + send_path
+        payload = _json_bytes(_mail_payload(to_addr, subject, body_text))
+        for attempt in range(GRAPH_ATTEMPTS):
+            r = await _graph_post(
+                url,
+                content=payload,
+                headers=headers,
+            )
+            if r.status_code not in GRAPH_RETRY_STATUSES or attempt == GRAPH_ATTEMPTS - 1:
+                break
+            try:
+                delay = float(r.headers.get("Retry-After", ""))
+            except ValueError:
+                delay = 0.3 * 2 ** attempt
+            await asyncio.sleep(min(delay, 10))
         if r.status_code in (200, 202):
             return True, "Message sent."
         return False, f"Graph send failed: {r.status_code} {r.text}"
     except Exception as e:
         return False, f"Graph exception: {e}"
 
+GRAPH_BATCH_MAX = 20  # Graph's limit on requests per $batch
+
+async def graph_send_mail_batch(send_path: str, recipients: list[str], subject: str, body_text: str, headers: dict) -> Tuple[bool, str]:
+    """
+    Send one copy per recipient via JSON $batch: up to 20 sendMail operations
+    per POST, and the POSTs themselves run concurrently.
+    """
+    try:
+        ops = [
+            {
+                "id": str(i),
+                "method": "POST",
+                "url": send_path,
+                "headers": {"Content-Type": "application/json"},
+                "body": _mail_payload(to_addr, subject, body_text),
+            }
+            for i, to_addr in enumerate(recipients)
+        ]
+        replies = await asyncio.gather(*(
+            _graph_post(
+                GRAPH_BATCH_URL,
+                content=_json_bytes({"requests": ops[i:i + GRAPH_BATCH_MAX]}),
+                headers=headers,
+            )
+            for i in range(0, len(ops), GRAPH_BATCH_MAX)
+        ))
+        failed = []
+        for r in replies:
+            if r.status_code != 200:
+                return False, f"Graph batch failed: {r.status_code} {r.text}"
+            for res in r.json().get("responses", []):
+                if res.get("status") not in (200, 202):
+                    failed.append(f"{recipients[int(res['id'])]} ({res.get('status')})")
+        if failed:
+            return False, "Graph send failed for: " + ", ".join(failed)
+        return True, "Message sent."
+    except Exception as e:
+        return False, f"Graph exception: {e}"
+
 
 # ---------------------------------------------------------------------
 # Utilities
 # ---------------------------------------------------------------------
 
+# The From line is only displayed in the body, so stripping the characters that could
+# break it out of "Name <addr>" is all the quoting it needs
+_ADDR_STRIP = str.maketrans("", "", '<>"\r\n')
+_BODY_TMPL = (
+    "New {app} contact form submission\n\n"
+    "From: {sender}\n"
+    "Subject: {subj}\n\n"
+    "Message:\n{msg}\n"
+)
+
+# Same rule as the Symptom Checker; catches typos before any Graph round trip
+_EMAIL_RE = re.compile(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$")
+
+def _from_addr(name: str, email: str) -> str:
+    return f"{(name or 'N/A').translate(_ADDR_STRIP)} <{email.translate(_ADDR_STRIP)}>"
+
 def mailto_fallback_link(to_addr: str, app_name: str, subject: str, name: str, email: str, message: str) -> str:
     subj = f"{app_name} - {subject or 'Contact'}"
-    body = f"From: {formataddr((name or 'N/A', email or 'noreply@example.com'))}\n\n{message or ''}"
-    return "mailto:" + to_addr + "?" + urllib.parse.urlencode({"subject": subj, "body": body})
+    body = f"From: {_from_addr(name, email or 'noreply@example.com')}\n\n{message or ''}"
+    # quote, not urlencode: spaces must be %20 in mailto ("+" shows up literally in some mail apps)
+    q = urllib.parse.quote
+    return f"mailto:{to_addr}?subject={q(subj, safe='')}&body={q(body, safe='')}"
 
-def rate_limited(key: str, seconds: int = 10) -> bool:
+def rate_limited(key: str, per_minute: int = 6) -> bool:
+    """
+    Token bucket per session: holds up to per_minute sends, refilled at
+    per_minute/60 per second, so a short burst passes but the sustained rate is capped.
+    """
     now = time.time()
-    last = st.session_state.get(key)
-    if last and now - last < seconds:
+    tokens, last = st.session_state.get(key, (float(per_minute), now))
+    tokens = min(per_minute, tokens + (now - last) * per_minute / 60)
+    if tokens < 1:
+        st.session_state[key] = (tokens, now)
         return True
-    st.session_state[key] = now
+    st.session_state[key] = (tokens - 1, now)
     return False
 
 
@@ -153,10 +296,50 @@ def rate_limited(key: str, seconds: int = 10) -> bool:
 # Page UI
 # ---------------------------------------------------------------------
 
+SEND_POLL_SECS = 2
+
+def _sends_pending() -> bool:
+    return any(not fut.done() for fut, _ in st.session_state.get("_send_futs", []))
+
+@st.fragment(run_every=SEND_POLL_SECS)
+def _poll_pending_sends():
+    # Only rendered while a send is in flight; once none is, a full rerun drops
+    # this fragment (and its timer) and lets report_sends() show the outcome.
+    if not _sends_pending():
+        st.rerun()
+    st.caption("Still sending your message…")
+
+def report_sends():
+    """
+    Show how backgrounded sends turned out. Failures stay on screen (with the
+    mailto fallback) until the next submit; delivered ones toast once and are
+    dropped. While any send is pending, a timed fragment polls for it.
+    """
+    keep = []
+    for fut, fallback_link in st.session_state.get("_send_futs", []):
+        if not fut.done():
+            keep.append((fut, fallback_link))
+            continue
+        ok_send, info = fut.result()  # graph_send_mail* never raise
+        if ok_send:
+            st.toast("Your message was delivered.")
+            continue
+        keep.append((fut, fallback_link))
+        st.error(info)
+        st.link_button("Open your email app instead", fallback_link, use_container_width=True)
+    st.session_state["_send_futs"] = keep
+    if _sends_pending():
+        _poll_pending_sends()
+
 def render_contact_page():
     cfg = load_cfg()
     st.title("Contact Us")
+    status = st.container()  # filled last, so a send queued by this run is polled too
+    contact_form(cfg)
+    with status:
+        report_sends()
 
+def contact_form(cfg):
     st.markdown(
         "<div class='contact-card'>"
         "<div class='muted'>Questions, feedback, or ideas? Send us a note.</div>"
@@ -185,8 +368,12 @@ def render_contact_page():
     if not message.strip():
         st.warning("Please enter a message.")
         return
-    if rate_limited("_contact_last_submit"):
-        st.info("Please wait a few seconds before sending another message.")
+    email = email.strip()
+    if email and not _EMAIL_RE.match(email):
+        st.warning("Please enter a valid email.")
+        return
+    if rate_limited("_contact_bucket"):
+        st.info("You've sent several messages in a row. Please wait a few seconds before sending another.")
         return
 
     # If Graph is not configured, provide a mailto fallback
@@ -213,29 +400,44 @@ def render_contact_page():
         )
         return
 
-    body = (
-        f"New {cfg['APP_NAME']} contact form submission\n\n"
-        f"From: {formataddr((name or 'N/A', email or '') )}\n"
-        f"Subject: {subject or 'Contact'}\n\n"
-        f"Message:\n{message}\n"
+    body = _BODY_TMPL.format(
+        app=cfg["APP_NAME"],
+        sender=_from_addr(name, email or ""),
+        subj=subject or "Contact",
+        msg=message,
     )
 
-    ok_send, info = graph_send_mail(
-        sender=cfg["SENDER"],
-        to_addr=cfg["CONTACT_TO"],
-        subject=subject or f"{cfg['APP_NAME']} - Contact Form",
-        body_text=body,
-        token=token_or_err,
-    )
-    if ok_send:
-        st.success("Message sent successfully.")
+    graph_headers = st.session_state["_graph_tok"]["headers"]
+    # CONTACT_TO may list several inboxes ("a@x.com, b@x.com"); those go out as one $batch
+    recipients = [a for a in re.split(r"[,;\s]+", cfg["CONTACT_TO"].strip()) if a]
+    if not recipients:
+        st.error("No contact inbox is configured. Please set CONTACT_TO.")
+        return
+    if len(recipients) > 1:
+        send = graph_send_mail_batch(
+            send_path=cfg["SEND_PATH"],
+            recipients=recipients,
+            subject=subject or f"{cfg['APP_NAME']} - Contact Form",
+            body_text=body,
+            headers=graph_headers,
+        )
     else:
-        st.error(info)
-        st.link_button(
-            "Open your email app instead",
-            mailto_fallback_link(cfg["CONTACT_TO"], cfg["APP_NAME"], subject, name, email, message),
-            use_container_width=True,
+        send = graph_send_mail(
+            send_path=cfg["SEND_PATH"],
+            to_addr=recipients[0],
+            subject=subject or f"{cfg['APP_NAME']} - Contact Form",
+            body_text=body,
+            headers=graph_headers,
         )
+    # Don't hold the page for the Graph round trip; report_sends() polls for the outcome.
+    # Failures from earlier submits have been shown already, so clear them now.
+    futs = [f for f in st.session_state.get("_send_futs", []) if not f[0].done() or f[0].result()[0]]
+    st.session_state["_send_futs"] = futs
+    futs.append((
+        submit_async(send),
+        mailto_fallback_link(cfg["CONTACT_TO"], cfg["APP_NAME"], subject, name, email, message),
+    ))
+    st.success("Queued — thanks! We'll confirm here once it's delivered.")
 
 
 # ---------------------------------------------------------------------
@@ -2,12 +2,11 @@
 """
 About Us — AI Clinic
 Place this file in: pages/08_About_Us.py
-Requires: streamlit, pillow
+Requires: streamlit
 """
 
 import os
 import streamlit as st
-from PIL import Image
 
 # ---------------------------------------------------------
 # Page config
@@ -85,14 +84,16 @@ CUSTOM_CSS = """
 st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # ---------------------------------------------------------
-# Logo / Hero Banner
+# Logo / Hero Banner (pre-sized by scripts/build_assets.py)
 # ---------------------------------------------------------
+@st.cache_data(show_spinner=False)
 def _resolve_logo_path() -> str | None:
+    # Assets don't move while the process runs; stat the candidates once
     candidates = [
-        "assets/h4u_logo.png",
-        "ai-clinic/assets/h4u_logo.png",
-        os.path.join(os.path.dirname(__file__), "assets/h4u_logo.png"),
-        os.path.join(os.path.dirname(__file__), "../assets/h4u_logo.png"),
+        "assets/h4u_logo_750x300.jpg",
+        "ai-clinic/assets/h4u_logo_750x300.jpg",
+        os.path.join(os.path.dirname(__file__), "assets/h4u_logo_750x300.jpg"),
+        os.path.join(os.path.dirname(__file__), "../assets/h4u_logo_750x300.jpg"),
     ]
     for p in candidates:
         if os.path.exists(p):
@@ -102,37 +103,27 @@ def _resolve_logo_path() -> str | None:
 logo_path = _resolve_logo_path()
 if logo_path:
     try:
-        img = Image.open(logo_path)
-        st.image(img.resize((750, 300)))
+        st.image(logo_path)
     except Exception as e:
         st.warning(f"Logo failed to load ({e})")
 else:
-    st.info("Logo not found at assets/h4u_logo.png (optional).")
+    st.info("Logo not found at assets/h4u_logo_750x300.jpg (optional).")
 
 # ---------------------------------------------------------
-# About Us Content
+# About Us Content + Footer
 # ---------------------------------------------------------
-st.title("About Us")
+# Fully static, so the title, card and footer go out as one markdown element
+ABOUT_HTML = """
+<h1>About Us</h1>
+<div class="card">
+  <p>We are a team with educational backgrounds from the University of UC Berkeley, and MIT, with extensive professional experience in medicine, data science, computer science, and artificial intelligence.</p>
 
-st.markdown(
-    """
-    <div class="card">
-      <p>We are a team with educational backgrounds from the University of UC Berkeley, and MIT, with extensive professional experience in medicine, data science, computer science, and artificial intelligence.</p>
+  <p>United by a shared mission, Health4UAI is building the <b>AI Clinic</b> model — a platform designed to make healthcare more efficient, accessible, and intelligent for patients, hospitals, doctors, and laboratories.</p>
 
-      <p>United by a shared mission, Health4UAI is building the <b>AI Clinic</b> model — a platform designed to make healthcare more efficient, accessible, and intelligent for patients, hospitals, doctors, and laboratories.</p>
+  <p>Our AI models are engineered to reach the standards of top physicians, providing insights and decision support that go beyond the average level of care. By improving efficiency across every step of the healthcare journey, we help patients save time and money while supporting doctors to focus on delivering higher-quality care.</p>
 
-      <p>Our AI models are engineered to reach the standards of top physicians, providing insights and decision support that go beyond the average level of care. By improving efficiency across every step of the healthcare journey, we help patients save time and money while supporting doctors to focus on delivering higher-quality care.</p>
-
-      <p>Founded in the United States, we are committed to bringing this new era of intelligent healthcare from the U.S. to the world.</p>
-    </div>
-    """,
-    unsafe_allow_html=True,
-)
-
-# ---------------------------------------------------------
-# Footer
-# ---------------------------------------------------------
-st.markdown(
-    "<p class='muted'>© Health4U AI — All rights reserved.</p>",
-    unsafe_allow_html=True,
-)
+  <p>Founded in the United States, we are committed to bringing this new era of intelligent healthcare from the U.S. to the world.</p>
+</div>
+<p class='muted'>© Health4U AI — All rights reserved.</p>
+"""
+st.markdown(ABOUT_HTML, unsafe_allow_html=True)
@@ -0,0 +1,66 @@
+# scripts/build_assets.py
+"""
+One-time build of pre-sized copies of the page images, so pages can pass a
+file path to st.image instead of decoding/resizing with PIL per rerun.
+
+Output is PNG for sources with real transparency and JPEG otherwise: those
+are the only formats st.image passes through untouched (anything else,
+WebP included, is re-encoded with PIL on every call).
+
+Run from the repo root after changing any source image or display size:
+    python scripts/build_assets.py
+"""
+
+import os
+
+from PIL import Image
+
+ASSETS_DIR = "assets"
+
+# (source file, (width, height)) — output is assets/<stem>_<W>x<H>.png|.jpg
+TARGETS = [
+    ("h4u_logo.png", (600, 250)),
+    ("h4u_logo.png", (650, 225)),
+    ("h4u_logo.png", (750, 300)),
+    ("symptom.jpg", (600, 400)),
+    ("ai_doctor_hero4.jpg", (600, 350)),
+    ("pharma.jpg", (600, 350)),
+    ("otc.png", (600, 350)),
+    ("appoint2.jpg", (600, 350)),
+    ("ai_doctor_hero5.jpg", (600, 350)),
+    ("20% OFF Pain Relief Offer.png", (250, 166)),
+    ("Ibuprofen Buy One, Get One Free.png", (250, 166)),
+]
+
+
+def has_alpha(im: Image.Image) -> bool:
+    # RGBA sources whose alpha is fully opaque can go to JPEG
+    return "A" in im.getbands() and im.getchannel("A").getextrema()[0] < 255
+
+
+def out_name(src: str, size: tuple[int, int], alpha: bool) -> str:
+    stem, _ = os.path.splitext(src)
+    return f"{stem}_{size[0]}x{size[1]}.{'png' if alpha else 'jpg'}"
+
+
+def build(src: str, size: tuple[int, int]) -> str:
+    with Image.open(os.path.join(ASSETS_DIR, src)) as im:
+        alpha = has_alpha(im)
+        out = os.path.join(ASSETS_DIR, out_name(src, size, alpha))
+        # st.image picks PNG only for RGBA images, so keep that mode for alpha sources
+        im = im.convert("RGBA" if alpha else "RGB").resize(size, Image.LANCZOS)
+        if alpha:
+            im.save(out, "PNG", optimize=True)
+        else:
+            im.save(out, "JPEG", quality=85, optimize=True, progressive=True)
+    return out
+
+
+def main():
+    for src, size in TARGETS:
+        out = build(src, size)
+        print(f"{src} -> {out} ({os.path.getsize(out)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# scripts/build_zip_centroids.py
+"""
+One-time build of assets/zip_centroids.pkl — {zip5: (lat, lon, state_code)}
+for every US ZIP with coordinates, read from the `zipcodes` package's bundled
+data through its public API (offline; no GeoNames download needed).
+
+The pickle is committed; pages fall back to pgeocode for ZIPs it lacks.
+Re-run from the repo root to refresh it (build-time only dependency):
+    pip install zipcodes==3.0.0
+    python scripts/build_zip_centroids.py
+"""
+
+import pickle
+
+import zipcodes
+
+OUT_PATH = "assets/zip_centroids.pkl"
+
+
+def main():
+    table = {}
+    for rec in zipcodes.list_all():
+        try:
+            lat, lon = float(rec["lat"]), float(rec["long"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        table[rec["zip_code"][:5]] = (lat, lon, (rec.get("state") or "").strip())
+    with open(OUT_PATH, "wb") as f:
+        pickle.dump(table, f, protocol=5)
+    print(f"Wrote {len(table)} ZIP centroids to {OUT_PATH}")
+
+
+if __name__ == "__main__":
+    main()